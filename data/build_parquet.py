@@ -0,0 +1,28 @@
+"""
+Generate Parquet copies of the CSV data files used by the missing data code.
+
+Each Parquet file is written next to the CSV it was generated from, and is
+loaded in preference to the CSV when it is at least as new; rerun this
+script after updating any of the CSV files. Requires pyarrow.
+
+Run from the top level of the repository:
+
+    python data/build_parquet.py
+"""
+import os.path
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from utils.missing_data_processing import CSV_PATHS, load_csv
+
+
+def build_parquet():
+    for dataset, csv_path in CSV_PATHS.items():
+        parquet_path = csv_path.with_suffix(".parquet")
+        print("Converting %s to %s" % (csv_path.name, parquet_path.name))
+        # read with the same column types used when loading from CSV
+        load_csv(dataset).to_parquet(parquet_path, compression="snappy", index=False)
+
+
+if __name__ == "__main__":
+    build_parquet()
@@ -1,4 +1,6 @@
 import os.path
+from functools import lru_cache
+
 import pandas as pd
 from typing import Tuple
 
@@ -30,9 +32,24 @@ def get_short_id(uri: str) -> str:
     """
     return uri.split("/")[-2] if pd.notna(uri) else None
 
+def get_short_ids(uris: pd.Series) -> pd.Series:
+    """
+    Extract short ids from a series of URIs; vectorized version of
+    :func:`get_short_id`. Missing values are preserved.
+
+    Parameters:
+    uris (pd.Series): The URIs from which to extract ids.
+
+    Returns:
+    pd.Series: The extracted ids.
+    """
+    return uris.str.rsplit("/", n=2).str[-2]
+
 def load_csv_as_df(csv_url: str) -> pd.DataFrame:
     """
     Load a CSV file into a pandas DataFrame and add an 'id' column.
+    If an up-to-date Parquet copy of the file has been generated
+    (see build_parquet.py), that is loaded instead.
 
     Parameters:
     csv_url (str): The URL of the CSV file to load.
@@ -40,8 +57,16 @@ def load_csv_as_df(csv_url: str) -> pd.DataFrame:
     Returns:
     pd.DataFrame: The loaded DataFrame.
     """
-    df = pd.read_csv(csv_url)
-    df["id"] = df.uri.apply(get_short_id)
+    parquet_path = os.path.splitext(csv_url)[0] + ".parquet"
+    if os.path.exists(parquet_path) and os.path.getmtime(
+        parquet_path
+    ) >= os.path.getmtime(csv_url):
+        df = pd.read_parquet(parquet_path)
+    else:
+        df = pd.read_csv(csv_url)
+    # events data has no uri column of its own
+    if "uri" in df.columns:
+        df["id"] = get_short_ids(df.uri)
     return df
 
 csv_urls_v1_1 = {
@@ -56,9 +81,19 @@ csv_urls = {
     "events": get_csv_path("SCoData_events_v1.2_2022-01.csv"),
 }
 
-def get_shxco_data() -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+@lru_cache(maxsize=4)
+def _load_shxco_data(
+    members_mtime: float, books_mtime: float, events_mtime: float
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
     """
-    Load the members, books, and events data into pandas DataFrames.
+    Load and prepare the members, books, and events data. Results are
+    cached; modification times of the source files are passed in so
+    that the data is reloaded whenever one of them changes.
+
+    Parameters:
+    members_mtime (float): Modification time of the members CSV file.
+    books_mtime (float): Modification time of the books CSV file.
+    events_mtime (float): Modification time of the events CSV file.
 
     Returns:
     Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]: The loaded DataFrames.
@@ -70,8 +105,23 @@ def get_shxco_data() -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
     members_df["member_id"] = members_df.id
     books_df["book_id"] = books_df.id
 
-    events_df[["first_member_uri", "second_member_uri"]] = events_df.member_uris.str.split(";", expand=True)
-    events_df = events_df[events_df.second_member_uri.isna()]
-    events_df["member_id"] = events_df.first_member_uri.apply(get_short_id)
+    # skip events for shared accounts (multiple member uris separated by ;)
+    shared_account = events_df.member_uris.str.contains(";", regex=False, na=False)
+    events_df = events_df[~shared_account].copy()
+    events_df["member_id"] = get_short_ids(events_df.member_uris)
+
+    return (members_df, books_df, events_df)
+
+def get_shxco_data() -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Load the members, books, and events data into pandas DataFrames.
+    Parsed data is cached for as long as the source CSV files are
+    unchanged; copies are returned so callers can safely modify them.
 
-    return (members_df, books_df, events_df)
\ No newline at end of file
+    Returns:
+    Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]: The loaded DataFrames.
+    """
+    mtimes = [
+        os.path.getmtime(csv_urls[dataset]) for dataset in ["members", "books", "events"]
+    ]
+    return tuple(df.copy() for df in _load_shxco_data(*mtimes))
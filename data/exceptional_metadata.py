@@ -6,7 +6,7 @@ from typing import Tuple
 import os
 import sys
 sys.path.append("..")
-from data.dataset import get_shxco_data
+from data.dataset import get_shxco_data, get_short_ids
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "source_data")
 
@@ -21,12 +21,8 @@ def get_longborrow_overides(events_df: pd.DataFrame) -> pd.DataFrame:
     pd.DataFrame: The updated events dataframe.
     """
     borrow_overrides = pd.read_csv("long_borrow_overrides.csv")
-    borrow_overrides["member_id"] = borrow_overrides.member_uris.apply(
-        lambda x: x.split("/")[-2]
-    )
-    borrow_overrides["item_uri"] = borrow_overrides.item_uri.apply(
-        lambda x: x.split("/")[-2] if pd.notna(x) else None
-    )
+    borrow_overrides["member_id"] = get_short_ids(borrow_overrides.member_uris)
+    borrow_overrides["item_uri"] = get_short_ids(borrow_overrides.item_uri)
     for borrow in borrow_overrides.itertuples():
         member_item_borrows = events_df[
             (events_df.event_type == "Borrow")
@@ -328,7 +324,7 @@ def calculate_exceptional_categories(write_to_csv: bool = False) -> Tuple[pd.Dat
         event_dfs.append(events)
 
     concat_events = pd.concat(event_dfs)
-    subset_events = concat_events[['index_col', 'item_uri', 'member_uris', 'start_date', 'type', 'books_out','excess_books_out', 'subscription_volumes', 'event_type', 'borrow_duration_days', 'subscription_duration_days', 'member_id', 'second_member_uri']]
+    subset_events = concat_events[['index_col', 'item_uri', 'member_uris', 'start_date', 'type', 'books_out','excess_books_out', 'subscription_volumes', 'event_type', 'borrow_duration_days', 'subscription_duration_days', 'member_id']]
 
     # subset_grouped = subset_events.groupby(['index_col'])['type'].transform(
     #     lambda x: ','.join(x)).reset_index(name='exceptional_types')
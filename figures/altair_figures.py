@@ -1,32 +1,71 @@
 import glob
-import os.path
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+
 import altair as alt
 import altair_saver
 from selenium import webdriver
 from webdriver_manager.chrome import ChromeDriverManager
 
-
-driver = webdriver.Chrome(ChromeDriverManager().install())
 # pip install altair altair_saver selenium<4.3 webdriver_manager
 
-# assuming all json files in this directory are altair json
-for filename in glob.glob("*.json"):
+# webdriver for the current worker process; set by init_worker
+driver = None
+
+
+def init_worker(driver_path):
+    # each worker process gets its own chrome instance, reused for all
+    # the charts it renders
+    global driver
+    driver = webdriver.Chrome(driver_path)
+    # quit chrome when the worker exits; worker processes skip atexit
+    # handlers, but multiprocessing runs finalizers on a normal exit
+    Finalize(driver, driver.quit, exitpriority=10)
+
+
+def is_current(output_file, source_mtime):
+    # output exists and is at least as new as the chart json it was made from
+    return os.path.exists(output_file) and os.path.getmtime(output_file) >= source_mtime
+
+
+def render(filename):
     print("Processing %s" % filename)
     # use filename without .json to name the exported figure
     basename = os.path.splitext(os.path.basename(filename))[0]
-    # skip if already exists
-    if os.path.exists("%s.png" % basename):
-        print("%s.png already exists, skipping" % basename)
-        continue
+    html_file = "%s.html" % basename
+    png_file = "%s.png" % basename
+    source_mtime = os.path.getmtime(filename)
+    html_current = is_current(html_file, source_mtime)
+    png_current = is_current(png_file, source_mtime)
+    # skip without parsing the chart if both outputs are up to date
+    if html_current and png_current:
+        print("%s and %s are up to date, skipping" % (html_file, png_file))
+        return
     with open(filename) as chart_input:
         chart = alt.Chart.from_json(chart_input.read())
-        print("Saving as %s.html" % basename)
-        chart.save("%s.html" % basename)
-        print("Saving as %s.png" % basename)
+    if not html_current:
+        print("Saving as %s" % html_file)
+        chart.save(html_file)
+    if not png_current:
+        print("Saving as %s" % png_file)
         altair_saver.save(
             chart,
-            "%s.png" % basename,
+            png_file,
             scale_factor=2.0,
             method="selenium",
             webdriver=driver,
         )
+
+
+if __name__ == "__main__":
+    # install chromedriver once, before starting the workers
+    driver_path = ChromeDriverManager().install()
+    # assuming all json files in this directory are altair json;
+    # render them in parallel, one chrome instance per worker
+    with ProcessPoolExecutor(
+        max_workers=max(1, os.cpu_count() // 2),
+        initializer=init_worker,
+        initargs=(driver_path,),
+    ) as executor:
+        list(executor.map(render, glob.glob("*.json")))
@@ -14,6 +14,7 @@ def test_paths():
 
     for path in missing_data_processing.CSV_PATHS.values():
         assert path.exists()
+    assert missing_data_processing.LOGBOOK_DATES_PATH.exists()
 
 
 def test_short_id():
@@ -27,6 +28,29 @@ def test_short_id():
     assert missing_data_processing.short_id(None) is None
 
 
+def test_short_ids():
+    uris = pd.Series(
+        [
+            "https://shakespeareandco.princeton.edu/members/alajouanine/",
+            "https://shakespeareandco.princeton.edu/books/ulysses-joyce",
+            None,
+        ]
+    )
+    short_ids = missing_data_processing.short_ids(uris)
+    assert short_ids[0] == "alajouanine"
+    assert short_ids[1] == "ulysses-joyce"
+    assert pd.isna(short_ids[2])
+    # same results as the single-URI version
+    assert short_ids[:2].tolist() == [
+        missing_data_processing.short_id(uri) for uri in uris[:2]
+    ]
+
+    # repeated URIs get the same ID; all missing stays missing
+    repeated = missing_data_processing.short_ids(pd.concat([uris, uris]))
+    assert repeated.iloc[3:5].tolist() == ["alajouanine", "ulysses-joyce"]
+    assert missing_data_processing.short_ids(pd.Series([None, None])).isna().all()
+
+
 def test_load_initial_data():
     data = missing_data_processing.load_initial_data()
     assert all([isinstance(df, pd.DataFrame) for df in data])
@@ -34,19 +58,78 @@ def test_load_initial_data():
 
 
 @patch("utils.missing_data_processing.pd")
+def test_load_dataset(mock_pd, tmp_path):
+    csv_path = tmp_path / "events.csv"
+    csv_path.touch()
+    with patch.dict(missing_data_processing.CSV_PATHS, {"events": csv_path}):
+        # no parquet copy: load from csv
+        missing_data_processing.load_dataset("events")
+        mock_pd.read_csv.assert_called_once()
+        mock_pd.read_parquet.assert_not_called()
+
+        # parquet copy newer than csv: load parquet instead
+        mock_pd.reset_mock()
+        parquet_path = tmp_path / "events.parquet"
+        parquet_path.touch()
+        missing_data_processing.load_dataset("events")
+        mock_pd.read_csv.assert_not_called()
+        mock_pd.read_parquet.assert_called_with(parquet_path)
+
+
+@patch("utils.missing_data_processing.load_csv")
+def test_load_dataset_cached(mock_load_csv, tmp_path):
+    mock_load_csv.return_value = pd.DataFrame({"uri": ["a", "b"]})
+    csv_path = tmp_path / "books.csv"
+    csv_path.touch()
+    with patch.dict(missing_data_processing.CSV_PATHS, {"books": csv_path}):
+        first = missing_data_processing.load_dataset("books")
+        second = missing_data_processing.load_dataset("books")
+    # file is only read once
+    mock_load_csv.assert_called_once_with("books")
+    # each call returns a separate copy
+    first["id"] = first.uri
+    assert "id" not in second.columns
+
+
+def test_load_csv_row_filter():
+    events_df = missing_data_processing.load_csv("events")
+    # read in chunks and keep only logbook and membership events
+    filtered_df = missing_data_processing.load_csv(
+        "events",
+        row_filter=missing_data_processing.is_logbook_or_membership_event,
+        chunksize=10_000,
+    )
+    expected_df = events_df[
+        missing_data_processing.is_logbook_or_membership_event(events_df)
+    ].reset_index(drop=True)
+    pd.testing.assert_frame_equal(filtered_df, expected_df)
+
+    # only selected columns are loaded
+    logbook_columns_df = missing_data_processing.load_csv(
+        "events", columns=missing_data_processing.LOGBOOK_EVENT_COLUMNS
+    )
+    assert set(logbook_columns_df.columns) == set(
+        missing_data_processing.LOGBOOK_EVENT_COLUMNS
+    )
+    assert len(logbook_columns_df) == len(events_df)
+
+
+@patch("utils.missing_data_processing.load_dataset")
 @patch("utils.missing_data_processing.preprocess_events_data")
 @patch("utils.missing_data_processing.preprocess_shxco_data")
-def test_get_preprocessed_data(mock_preprocess_shxco, mock_preprocess_events, mock_pd):
+def test_get_preprocessed_data(
+    mock_preprocess_shxco, mock_preprocess_events, mock_load_dataset
+):
     # no datasets specified: should return all
     data = missing_data_processing.get_preprocessed_data()
     for dataset in missing_data_processing.CSV_PATHS.keys():
         assert dataset in data
-    assert mock_pd.read_csv.call_count == 4
+    assert mock_load_dataset.call_count == 4
     mock_preprocess_events.assert_called()
     mock_preprocess_shxco.assert_called()
 
     # reset mocks
-    for m in [mock_preprocess_shxco, mock_preprocess_events, mock_pd]:
+    for m in [mock_preprocess_shxco, mock_preprocess_events, mock_load_dataset]:
         m.reset_mock()
 
     # test loading selected datasets
@@ -73,3 +156,134 @@ def test_get_logbook_events():
     # check changed types
     assert logbook_df.start_date.dtype == "datetime64[ns]"
     assert logbook_df.subscription_purchase_date.dtype == "datetime64[ns]"
+
+
+def test_get_earliest_date():
+    events_df = pd.DataFrame(
+        {
+            "start_date": ["1920-05-01", None, "1919-12-02", None],
+            "subscription_purchase_date": ["1920-04-28", "1921-03", "--12-02", None],
+            "end_date": ["1920-06-01", "1921-04-01", "1920-06-02", None],
+        }
+    )
+    earliest = missing_data_processing.get_earliest_date(events_df)
+    assert earliest[0] == datetime(1920, 4, 28)
+    # partial dates are converted to the first day of the month
+    assert earliest[1] == datetime(1921, 3, 1)
+    # dates without a year can't be compared
+    assert pd.isna(earliest[2])
+    # no dates
+    assert pd.isna(earliest[3])
+
+    # dates that have already been converted are used as-is
+    parsed_df = events_df.apply(pd.to_datetime, format="ISO8601", errors="coerce")
+    earliest = missing_data_processing.get_earliest_date(parsed_df)
+    assert earliest[0] == datetime(1920, 4, 28)
+    assert earliest[1] == datetime(1921, 3, 1)
+    assert pd.isna(earliest[3])
+
+
+def test_earliest_date_deprecated():
+    row = pd.Series(
+        {
+            "start_date": "1920-05-01",
+            "subscription_purchase_date": "1920-04-28",
+            "end_date": None,
+        }
+    )
+    with pytest.deprecated_call():
+        assert missing_data_processing.earliest_date(row) == datetime(1920, 4, 28)
+
+
+def test_get_membership_events():
+    events_df = missing_data_processing.get_preprocessed_data("events")["events"]
+    membership_events = missing_data_processing.get_membership_events(events_df)
+    assert membership_events.event_type.isin(
+        missing_data_processing.MEMBERSHIP_EVENT_TYPES
+    ).all()
+    # earliest date as given in the data, and in datetime format
+    assert membership_events.columns[-2:].tolist() == ["earliest_date", "date"]
+    dated = membership_events[membership_events.earliest_date.str.len() == 10]
+    assert (pd.to_datetime(dated.earliest_date) == dated.date).all()
+
+    # earliest dates are per event, even if index labels repeat
+    events_df = pd.DataFrame(
+        {
+            "event_type": ["Subscription", "Renewal", "Renewal"],
+            "start_date": ["1920-05-01", "1925-01-01", None],
+            "subscription_purchase_date": [None, None, None],
+            "end_date": ["1920-06-01", "1925-02-01", None],
+        },
+        index=[0, 0, 1],
+    )
+    membership_events = missing_data_processing.get_membership_events(events_df)
+    assert membership_events.earliest_date.iloc[:2].tolist() == [
+        "1920-05-01",
+        "1925-01-01",
+    ]
+    assert pd.isna(membership_events.earliest_date.iloc[2])
+
+
+def test_precomputed_earliest_dates():
+    events_df = missing_data_processing.get_preprocessed_data("events")["events"]
+    earliest_dates = missing_data_processing.get_earliest_date(events_df)
+    # precomputed dates give the same membership and member events
+    pd.testing.assert_frame_equal(
+        missing_data_processing.get_membership_events(events_df, earliest_dates),
+        missing_data_processing.get_membership_events(events_df),
+    )
+    pd.testing.assert_frame_equal(
+        missing_data_processing.get_member_events(events_df, earliest_dates)[0],
+        missing_data_processing.get_member_events(events_df)[0],
+    )
+    # an unrelated 'date' column is not mistaken for the earliest dates
+    dated_events_df = events_df.assign(date=pd.Timestamp("1950-01-01"))
+    pd.testing.assert_frame_equal(
+        missing_data_processing.get_member_events(dated_events_df)[0],
+        missing_data_processing.get_member_events(events_df)[0],
+    )
+
+
+def test_get_member_events_first_event_type():
+    events_df = pd.DataFrame(
+        {
+            "event_type": ["Generic", "Subscription", "Renewal"],
+            "member_id": ["alajouanine", "alajouanine", "bernheim"],
+            "source_type": ["Logbook", "Logbook", "Logbook"],
+            "start_date": ["1920-01-01", "1920-02-01", "1921-01-01"],
+            "subscription_purchase_date": [None, None, None],
+            "end_date": [None, None, None],
+        }
+    )
+    _, _, first_dates = missing_data_processing.get_member_events(events_df)
+    first = first_dates.set_index("member_id")
+    # date of the first event, but the first known event type
+    assert first.loc["alajouanine", "date"] == datetime(1920, 1, 1)
+    assert first.loc["alajouanine", "event_type"] == "Subscription"
+    assert first.loc["bernheim", "event_type"] == "Renewal"
+
+
+def test_exclude_gap_events():
+    events_df = pd.DataFrame(
+        {
+            "logbook_date": pd.to_datetime(
+                ["1920-01-01", "1920-02-01", "1920-02-15", "1920-04-01", None]
+            )
+        }
+    )
+    gaps = [
+        {"start": datetime(1920, 2, 1), "end": datetime(1920, 2, 15), "days": 14},
+        {"start": datetime(1920, 3, 1), "end": datetime(1920, 3, 31), "days": 30},
+    ]
+    nogaps_df = missing_data_processing.exclude_gap_events(events_df, gaps)
+    # events on gap start and end dates are excluded; undated events are kept
+    assert nogaps_df.index.tolist() == [0, 3, 4]
+    # no gaps: nothing excluded
+    assert len(missing_data_processing.exclude_gap_events(events_df, [])) == 5
+
+    # dates in another column
+    dates_df = events_df.rename(columns={"logbook_date": "date"})
+    nogaps_df = missing_data_processing.exclude_gap_events(
+        dates_df, gaps, date_column="date"
+    )
+    assert nogaps_df.index.tolist() == [0, 3, 4]
@@ -1,3 +1,4 @@
+import numpy as np
 import vl_convert as vlc
 import altair as alt
 
@@ -13,28 +14,37 @@ def save_altair_chart(chart, filename, scale_factor=1):
     ----------
     chart : altair.Chart
         Altair chart to save
-    filename : str
-        The path to save the chart to
+    filename : str or list of str
+        The path to save the chart to. To save the chart in more than one
+        format, pass a list of paths; the chart spec is only generated once.
     scale_factor: int or float
         The factor to scale the image resolution by.
         E.g. A value of `2` means two times the default resolution.
     """
+    filenames = [filename] if isinstance(filename, str) else filename
+    # check all formats are supported before doing any work
+    if any(f.split(".")[-1] not in ["svg", "png"] for f in filenames):
+        raise ValueError("Only svg and png formats are supported")
+
     with alt.data_transformers.enable(
         "default"
     ), alt.data_transformers.disable_max_rows():
+        spec = chart.to_dict()
+
+    for filename in filenames:
         if filename.split(".")[-1] == "svg":
             with open(filename, "w") as f:
-                f.write(vlc.vegalite_to_svg(chart.to_dict()))
-        elif filename.split(".")[-1] == "png":
-            with open(filename, "wb") as f:
-                f.write(vlc.vegalite_to_png(chart.to_dict(), scale=scale_factor))
+                f.write(vlc.vegalite_to_svg(spec))
         else:
-            raise ValueError("Only svg and png formats are supported")
+            with open(filename, "wb") as f:
+                f.write(vlc.vegalite_to_png(spec, scale=scale_factor))
 
 
-def raincloud_plot(dataset, fieldname, field_label, tooltip=None):
+def raincloud_plot(dataset, fieldname, field_label, tooltip=None, seed=0):
     """Create a raincloud plot for the density of the specified field
-    in the given dataset. Takes an optional tooltip for the strip plot.
+    in the given dataset. Takes an optional tooltip for the strip plot,
+    and an optional seed for the random jitter (fixed by default,
+    so the same data always produces the same figure).
     Returns an altair chart."""
 
     # create a density area plot of specified fieldname
@@ -80,8 +90,14 @@ def raincloud_plot(dataset, fieldname, field_label, tooltip=None):
             ~click_selection, default_color, highlight_color
         )
 
+    # precompute the random jitter for the y axis, rather than having vega
+    # compute it for every point each time the chart is rendered
+    jittered_dataset = dataset.assign(
+        jitter=np.random.default_rng(seed).uniform(-0.0052, -0.0002, size=len(dataset))
+    )
+
     stripplot = (
-        alt.Chart(dataset)
+        alt.Chart(jittered_dataset)
         .mark_circle(size=50)
         .encode(
             x=alt.X(
@@ -92,7 +108,6 @@ def raincloud_plot(dataset, fieldname, field_label, tooltip=None):
             y=alt.Y("jitter:Q", title=None, axis=None),
             **opt_encode_args,
         )
-        .transform_calculate(jitter="(random() / 200) - 0.0052")
         .properties(
             height=120,
             width=800,
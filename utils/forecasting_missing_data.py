@@ -1,63 +1,58 @@
 # Standard library imports
 from datetime import timedelta, date
 import math
-import warnings
 from typing import List
 
 # Related third party imports
 import altair as alt
+from joblib import Parallel, delayed
+import numpy as np
 import pandas as pd
+from pandas.api.types import CategoricalDtype
 from prophet import Prophet
 
 # Disable max rows for altair
 alt.data_transformers.disable_max_rows()
 
-# Ignore warnings
-warnings.filterwarnings('ignore')
+# Prophet forecast columns used when plotting forecasts
+PLOT_COLUMNS = ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
 
 
-def plot_gap_areas(logbook_gaps: List, chart_height: int, newmember_subscriptions_by_week: pd.DataFrame, include_line: bool = False) -> alt.Chart:
+def plot_gap_areas(logbook_gaps: List, chart_height: int, newmember_subscriptions_by_week: pd.DataFrame = None, include_line: bool = False) -> alt.Chart:
     """Plot the gap areas.
 
     Args:
         logbook_gaps (List): The logbook gaps.
         chart_height (int): The chart height.
-        newmember_subscriptions_by_week (pd.DataFrame): The new member subscriptions by week.
+        newmember_subscriptions_by_week (pd.DataFrame): The new member subscriptions by week; only used if include_line is True.
         include_line (bool): Whether to include the line.
     
     Returns:
         alt.Chart: The gap areas."""
-    if include_line:
-        base = alt.Chart(newmember_subscriptions_by_week).encode(
-            alt.X('date:T', axis=alt.Axis(title='Duration of the Lending Library'))
-        ).properties(
-            width=1200,
-            height=chart_height
-        )
-
-
-        line = base.mark_line(stroke='#5276A7').encode(
-            alt.Y('total',
-                axis=alt.Axis(title='Total', titleColor='#5276A7'))
-        )
-
-    gap_areas = None
-    for gap in logbook_gaps:
-
-        rect_df = pd.DataFrame({
-            'x1': [pd.to_datetime(gap['start'])],
-            'x2': [pd.to_datetime(gap['end'])],
-        })
-        area = alt.Chart(rect_df).mark_rect(opacity=0.3, color='gray').encode(
-            x='x1', x2='x2',
-            y=alt.value(0), y2=alt.value(chart_height)
-        )
-
-        if gap_areas is None:
-            gap_areas = area
-        else:
-            gap_areas += area
-    return line + gap_areas if include_line else gap_areas
+    # Draw all the gaps as a single rect mark, one row per gap
+    rect_df = pd.DataFrame({
+        'x1': pd.to_datetime([gap['start'] for gap in logbook_gaps]),
+        'x2': pd.to_datetime([gap['end'] for gap in logbook_gaps]),
+    })
+    gap_areas = alt.Chart(rect_df).mark_rect(opacity=0.3, color='gray').encode(
+        x='x1:T', x2='x2:T',
+        y=alt.value(0), y2=alt.value(chart_height)
+    )
+    if not include_line:
+        return gap_areas
+
+    base = alt.Chart(newmember_subscriptions_by_week).encode(
+        alt.X('date:T', axis=alt.Axis(title='Duration of the Lending Library'))
+    ).properties(
+        width=1200,
+        height=chart_height
+    )
+
+    line = base.mark_line(stroke='#5276A7').encode(
+        alt.Y('total',
+            axis=alt.Axis(title='Total', titleColor='#5276A7'))
+    )
+    return line + gap_areas
 
 def prepare_data_for_prophet(weekly_subscriptions: pd.DataFrame, gap_start_date: date, post1932_date: date) -> pd.DataFrame:
     """Prepare data for Prophet.
@@ -69,36 +64,56 @@ def prepare_data_for_prophet(weekly_subscriptions: pd.DataFrame, gap_start_date:
     
     Returns:
         pd.DataFrame: The data for Prophet."""
-    # Filter data based on gap start date and post1932 condition
-    data_before_gap = weekly_subscriptions[weekly_subscriptions.date < gap_start_date]
+    # Filter data based on gap start date and post1932 condition; with
+    # dates sorted, find the bounds with a binary search
+    if not weekly_subscriptions.date.is_monotonic_increasing:
+        weekly_subscriptions = weekly_subscriptions.sort_values('date')
+    weekly_dates = weekly_subscriptions.date.to_numpy()
+    end = np.searchsorted(weekly_dates, pd.Timestamp(gap_start_date).to_datetime64(), side='left')
+    start = 0
     if gap_start_date.year >= 1936:
-        data_before_gap = data_before_gap[data_before_gap.date >= post1932_date]
+        start = np.searchsorted(weekly_dates, pd.Timestamp(post1932_date).to_datetime64(), side='left')
+    data_before_gap = weekly_subscriptions.iloc[start:end]
     # Rename columns for Prophet
     return data_before_gap.rename(columns={'date': 'ds', 'total': 'y'})
 
-def forecast_gap_with_prophet(data_before_gap: pd.DataFrame, gap_duration: dict, time_duration: date, use_weekly_growth_cap:bool=False, growth_cap:bool=None, model_weekly:bool=True, model_monthly:bool=False, model_daily:bool=False) -> pd.DataFrame:
-    """Forecast gap with Prophet.
+def fit_prophet_model(data_before_gap: pd.DataFrame, use_weekly_growth_cap:bool=False, growth_cap:bool=None, model_daily:bool=False, need_intervals:bool=True) -> Prophet:
+    """Fit a Prophet model on the data before a gap.
 
     Args:
         data_before_gap (pd.DataFrame): The data before gap.
-        gap_duration (dict): The gap duration.
         use_weekly_growth_cap (bool): Whether to use weekly growth cap.
         growth_cap (bool): The growth cap.
+        model_daily (bool): Whether to model daily.
+        need_intervals (bool): Whether forecasts need uncertainty intervals; sampling them is skipped if not.
 
     Returns:
-        pd.DataFrame: The forecasted gap with Prophet."""
+        Prophet: The fitted Prophet model."""
+    # Skip simulating uncertainty intervals when they won't be used
+    prophet_opts = {} if need_intervals else {'uncertainty_samples': 0}
     # Initialize Prophet and fit data
     if use_weekly_growth_cap:
-        prophet_model = Prophet(growth='logistic', weekly_seasonality=True)
+        prophet_model = Prophet(growth='logistic', weekly_seasonality=True, **prophet_opts)
         data_before_gap['floor'] = 0
         data_before_gap['cap'] = growth_cap
     else:
         if model_daily:
-            prophet_model = Prophet(daily_seasonality=True)
+            prophet_model = Prophet(daily_seasonality=True, **prophet_opts)
         else:
-            prophet_model = Prophet()
-    prophet_model.fit(data_before_gap)
-    
+            prophet_model = Prophet(**prophet_opts)
+    return prophet_model.fit(data_before_gap)
+
+def forecast_gap_with_model(prophet_model: Prophet, gap_duration: dict, time_duration: date, use_weekly_growth_cap:bool=False, growth_cap:bool=None, model_weekly:bool=True, model_monthly:bool=False, model_daily:bool=False) -> pd.DataFrame:
+    """Forecast gap with an already fitted Prophet model.
+
+    Args:
+        prophet_model (Prophet): The fitted Prophet model.
+        gap_duration (dict): The gap duration.
+        use_weekly_growth_cap (bool): Whether to use weekly growth cap.
+        growth_cap (bool): The growth cap.
+
+    Returns:
+        pd.DataFrame: The forecasted gap with Prophet."""
     # Calculate forecast period in weeks and add extra buffer
     if model_weekly:
         forecast_duration = math.ceil(gap_duration['days'] / 7) + 7
@@ -119,7 +134,45 @@ def forecast_gap_with_prophet(data_before_gap: pd.DataFrame, gap_duration: dict,
     forecast_near_gap = forecasted_subscriptions[(forecasted_subscriptions.ds > (gap_duration['start'] - time_duration)) & (forecasted_subscriptions.ds < (gap_duration['end'] + time_duration))]
     return forecasted_subscriptions, forecast_near_gap
 
-def forecast_missing_subscriptions(weekly_subscriptions: pd.DataFrame, logbook_gaps: List, post1932_date: date, model_weekly:bool=True, model_monthly:bool=False, model_daily:bool=False, train_all_data:bool=False, return_prophet_model:bool=False, return_all_gap_forecasts:bool=False, use_weekly_growth_cap:bool=False, use_total_growth_cap:bool=False) -> pd.DataFrame:
+def forecast_gap_with_prophet(data_before_gap: pd.DataFrame, gap_duration: dict, time_duration: date, use_weekly_growth_cap:bool=False, growth_cap:bool=None, model_weekly:bool=True, model_monthly:bool=False, model_daily:bool=False, need_intervals:bool=True) -> pd.DataFrame:
+    """Forecast gap with Prophet.
+
+    Args:
+        data_before_gap (pd.DataFrame): The data before gap.
+        gap_duration (dict): The gap duration.
+        use_weekly_growth_cap (bool): Whether to use weekly growth cap.
+        growth_cap (bool): The growth cap.
+        need_intervals (bool): Whether the forecast needs uncertainty intervals (yhat_lower, yhat_upper).
+
+    Returns:
+        pd.DataFrame: The forecasted gap with Prophet."""
+    prophet_model = fit_prophet_model(data_before_gap, use_weekly_growth_cap, growth_cap, model_daily, need_intervals)
+    return forecast_gap_with_model(prophet_model, gap_duration, time_duration, use_weekly_growth_cap, growth_cap, model_weekly, model_monthly, model_daily)
+
+def _forecast_gaps(data_before_gap: pd.DataFrame, gaps: List, time_duration: timedelta, use_weekly_growth_cap:bool, growth_cap:bool, model_weekly:bool, model_monthly:bool, model_daily:bool, all_data_model:Prophet=None, use_total_growth_cap:bool=False, need_intervals:bool=True, forecast_columns:List=None) -> List:
+    """Fit a single Prophet model on the data before one or more gaps
+    and forecast each of them; run in a separate worker process for each
+    distinct set of training data. If a model trained on all data is
+    given, the gap forecasts are re-predicted with that model. If forecast
+    columns are specified, only those columns are returned."""
+    prophet_model = fit_prophet_model(data_before_gap, use_weekly_growth_cap, growth_cap, model_daily, need_intervals)
+    gap_forecasts = []
+    for gap in gaps:
+        forecasted_subscriptions, forecasted_near_gap = forecast_gap_with_model(prophet_model, gap, time_duration, use_weekly_growth_cap, growth_cap, model_weekly, model_monthly, model_daily)
+        if all_data_model is not None:
+            if use_total_growth_cap:
+                forecasted_subscriptions['floor'] = 0
+                forecasted_subscriptions['cap'] = growth_cap
+            forecasted_subscriptions = all_data_model.predict(forecasted_subscriptions)
+        if forecast_columns is not None:
+            forecasted_subscriptions = forecasted_subscriptions[forecast_columns]
+            # without intervals, the per-gap forecast is only used for its dates
+            if need_intervals:
+                forecasted_near_gap = forecasted_near_gap[forecast_columns]
+        gap_forecasts.append((forecasted_subscriptions, forecasted_near_gap))
+    return gap_forecasts
+
+def forecast_missing_subscriptions(weekly_subscriptions: pd.DataFrame, logbook_gaps: List, post1932_date: date, model_weekly:bool=True, model_monthly:bool=False, model_daily:bool=False, train_all_data:bool=False, return_prophet_model:bool=False, return_all_gap_forecasts:bool=False, use_weekly_growth_cap:bool=False, use_total_growth_cap:bool=False, n_jobs:int=-1, forecast_columns:List=None) -> pd.DataFrame:
     """Forecast missing subscriptions.
 
     Args:
@@ -134,6 +187,8 @@ def forecast_missing_subscriptions(weekly_subscriptions: pd.DataFrame, logbook_g
         return_all_gap_forecasts (bool): Whether to return all gap forecasts.
         use_weekly_growth_cap (bool): Whether to use weekly growth cap.
         use_total_growth_cap (bool): Whether to use total growth cap.
+        n_jobs (int): Number of processes used to fit the per-gap models in parallel (-1 for all cores).
+        forecast_columns (List): Prophet output columns to keep, e.g. PLOT_COLUMNS; all columns are kept by default.
     
     Returns:
         pd.DataFrame: The missing subscriptions forecast."""
@@ -151,35 +206,78 @@ def forecast_missing_subscriptions(weekly_subscriptions: pd.DataFrame, logbook_g
     all_forecasts = []
     all_gap_forecasts = []
 
-    for gap in logbook_gaps:
-        gap_start_date = gap['start']
-
-        data_before_gap = prepare_data_for_prophet(weekly_subscriptions, gap_start_date, post1932_date)
-        forecasted_subscriptions, forecasted_near_gap = forecast_gap_with_prophet(data_before_gap, gap, time_duration, use_weekly_growth_cap, growth_cap, model_weekly, model_monthly, model_daily)
-        
+    # Training data is selected from the weekly subscriptions by date range
+    if not weekly_subscriptions.date.is_monotonic_increasing:
+        weekly_subscriptions = weekly_subscriptions.sort_values('date')
+
+    # Group gaps by their training data, identified by its first and last
+    # dates and length, so that gaps with identical training data share a
+    # single fitted model
+    training_windows = {}
+    for i, gap in enumerate(logbook_gaps):
+        data_before_gap = prepare_data_for_prophet(weekly_subscriptions, gap['start'], post1932_date)
+        window_key = (data_before_gap.ds.min(), data_before_gap.ds.max(), len(data_before_gap))
+        training_windows.setdefault(window_key, (data_before_gap, []))[1].append(i)
+
+    # When re-predicting with the model trained on all data, the per-gap
+    # forecasts only provide the dates, so their intervals are not needed
+    need_intervals = return_all_gap_forecasts or not train_all_data
+
+    # Fit and forecast each distinct training window independently, in
+    # parallel; the model trained on all data (if any) is fitted once above
+    # and sent to the workers to re-predict each gap forecast
+    window_forecasts = Parallel(n_jobs=n_jobs, backend='loky')(
+        delayed(_forecast_gaps)(data_before_gap, [logbook_gaps[i] for i in gap_indices], time_duration, use_weekly_growth_cap, growth_cap, model_weekly, model_monthly, model_daily, prophet_model if train_all_data else None, use_total_growth_cap, need_intervals, forecast_columns)
+        for data_before_gap, gap_indices in training_windows.values()
+    )
+    # Put the forecasts back in gap order
+    gap_forecasts = [None] * len(logbook_gaps)
+    for (_, gap_indices), forecasts in zip(training_windows.values(), window_forecasts):
+        for i, forecast in zip(gap_indices, forecasts):
+            gap_forecasts[i] = forecast
+
+    last_ds = None
+    for forecasted_subscriptions, forecasted_near_gap in gap_forecasts:
         # Optional: Display or process forecast_near_gap as needed
         # display(forecast_near_gap.head())
 
         if return_all_gap_forecasts:
             all_gap_forecasts.append(forecasted_near_gap)
 
-        if train_all_data:
-            if use_total_growth_cap:
-                forecasted_subscriptions['floor'] = 0
-                forecasted_subscriptions['cap'] = growth_cap
-
-            reforecasted_subscriptions = prophet_model.predict(forecasted_subscriptions)
-            all_forecasts.append(reforecasted_subscriptions)
-        else:
-            all_forecasts.append(forecasted_subscriptions)
+        # Each forecast also covers the dates before its gap; keep only
+        # dates not already covered by the forecast for an earlier gap
+        if last_ds is not None:
+            forecasted_subscriptions = forecasted_subscriptions[forecasted_subscriptions.ds > last_ds]
+        if len(forecasted_subscriptions):
+            last_ds = forecasted_subscriptions.ds.max()
+        all_forecasts.append(forecasted_subscriptions)
 
-    # Combine all forecasts into a single DataFrame
+    # Combine all forecasts into a single DataFrame; the per-gap forecasts
+    # are not used again, so avoid copying their data where possible
     if return_prophet_model:
-        return prophet_model, pd.concat(all_forecasts)
+        return prophet_model, pd.concat(all_forecasts, copy=False)
     elif return_all_gap_forecasts:
-        return pd.concat(all_gap_forecasts)
+        return pd.concat(all_gap_forecasts, copy=False)
     else:
-        return pd.concat(all_forecasts)
+        return pd.concat(all_forecasts, copy=False)
+
+def _decade_label(ds: pd.Series, boundaries: List, default: str) -> np.ndarray:
+    """
+    Label dates by the period they fall in.
+
+    Args:
+        ds (pd.Series): The dates to label.
+        boundaries (List): (boundary date, label) pairs in ascending date order; dates before a boundary get its label.
+        default (str): The label for dates after the last boundary.
+
+    Returns:
+        np.ndarray: The label for each date.
+    """
+    dates = ds.to_numpy()
+    # np.select uses the first matching condition, so each date gets the label of the earliest boundary it precedes
+    conditions = [dates < pd.Timestamp(boundary).to_datetime64() for boundary, _ in boundaries]
+    choices = [label for _, label in boundaries]
+    return np.select(conditions, choices, default=default)
 
 def plot_newsubs_weekly_forecast(forecast_df: pd.DataFrame, gap_areas: alt.Chart, logbook_gaps: List, chart_height: int, post1932: date, newmember_subscriptions_by_week: pd.DataFrame, show_model:bool=False, separate_model_decades:bool=False) -> alt.Chart:
     """Plot the new subscriptions weekly forecast.
@@ -196,8 +294,11 @@ def plot_newsubs_weekly_forecast(forecast_df: pd.DataFrame, gap_areas: alt.Chart
     
     Returns:
         alt.Chart: The new subscriptions weekly forecast."""
-    forecast_uniq = forecast_df.drop_duplicates(keep='first').reset_index(drop=True)
-    known_df = newmember_subscriptions_by_week.copy()
+    # Only the plotted forecast columns are embedded in the chart spec;
+    # the other Prophet model components are not needed for the chart.
+    # Keep one row per date (the first forecast for it); forecasts from
+    # forecast_missing_subscriptions are already unique, so this is cheap.
+    forecast_uniq = forecast_df[PLOT_COLUMNS].drop_duplicates(subset='ds', keep='first').reset_index(drop=True)
 
     # Set base chart properties
     base = alt.Chart().encode(
@@ -209,9 +310,15 @@ def plot_newsubs_weekly_forecast(forecast_df: pd.DataFrame, gap_areas: alt.Chart
     
     line_width = 1
 
-    # label as documented information
-    known_df['label'] = "Documented"
     label_colors = {"Documented": "#5276A7", "Forecast model - 1920s": "red", "Forecast model - 1930s": "purple", "Forecast": "orange", "Forecast model": "red"}
+    # store labels as categoricals rather than repeating the strings on every row
+    label_type = CategoricalDtype(categories=list(label_colors.keys()))
+
+    # label as documented information; assign returns a new frame without
+    # copying the existing columns
+    known_df = newmember_subscriptions_by_week.assign(
+        label=pd.Categorical(["Documented"] * len(newmember_subscriptions_by_week), dtype=label_type)
+    )
 
     if not show_model:
         keys_to_remove = ["Forecast model", "Forecast model - 1920s", "Forecast model - 1930s"]
@@ -223,63 +330,74 @@ def plot_newsubs_weekly_forecast(forecast_df: pd.DataFrame, gap_areas: alt.Chart
     for key in keys_to_remove:
         label_colors.pop(key, None)
 
+    # Shared scales and encodings, used by all of the layers below
+    color_scale = alt.Scale(domain=list(label_colors.keys()), range=list(label_colors.values()))
+    label_color = alt.Color('label', scale=color_scale)
+    max_y = known_df.total.max()
+    y_scale = alt.Scale(domain=(0, max_y + 5), clamp=True)
+    ds_x = alt.X('ds:T')
+    yhat_y = alt.Y('yhat', scale=y_scale)
+
     newmember_line = base.mark_line(strokeWidth=line_width).encode(
         alt.Y('total', axis=alt.Axis(title='total')),
-        color=alt.Color('label:N', legend=alt.Legend(title=""), scale=alt.Scale(domain=list(label_colors.keys()), range=list(label_colors.values()))),
+        color=alt.Color('label:N', legend=alt.Legend(title=""), scale=color_scale),
     ).properties(data=known_df)
 
-    graph = newmember_line
-
-    max_y = known_df.total.max()
-    y_scale = alt.Scale(domain=(0, max_y + 5), clamp=True)
+    # chart layers, combined once at the end
+    layers = [newmember_line]
 
     if show_model:
-        forecast_uniq['ds'] = pd.to_datetime(forecast_uniq['ds'])  # Ensure ds is datetime for comparison
-
+        # Prophet forecast dates are already datetime64, so no conversion is needed
         if separate_model_decades:
-            forecast_uniq['label'] = forecast_uniq.apply(
-                lambda x: "Forecast model - 1920s" if x.ds < post1932 else "Forecast model - 1930s", axis=1
-            )
+            forecast_uniq['label'] = pd.Categorical(_decade_label(
+                forecast_uniq['ds'],
+                [(post1932, "Forecast model - 1920s")],
+                default="Forecast model - 1930s"
+            ), dtype=label_type)
 
             forecast_line = base.mark_line(opacity=0.5, strokeWidth=line_width).encode(
-                alt.X('ds:T'),
-                alt.Y('yhat', scale=y_scale),
-                color=alt.Color('label', scale=alt.Scale(domain=list(label_colors.keys()), range=list(label_colors.values())))
+                ds_x, yhat_y, color=label_color
             ).properties(data=forecast_uniq)
 
-            graph += forecast_line
+            layers.append(forecast_line)
         else:
-            forecast_uniq['label'] = 'Forecast model'
+            forecast_uniq['label'] = pd.Series('Forecast model', index=forecast_uniq.index, dtype=label_type)
             forecast_line = base.mark_line(opacity=0.5, strokeWidth=line_width).encode(
-                alt.X('ds:T'), alt.Y('yhat', scale=y_scale),
-                color=alt.Color("label", scale=alt.Scale(domain=list(label_colors.keys()), range=list(label_colors.values())))
+                ds_x, yhat_y, color=label_color
             ).properties(data=forecast_uniq)
 
-            graph += forecast_line    
+            layers.append(forecast_line)
 
     # Handle gaps
-    onemonth = timedelta(days=30)
-
-    for _, gap in enumerate(logbook_gaps):
-        gap_start, gap_end = pd.to_datetime(gap['start']), pd.to_datetime(gap['end'])
-        gap_forecast = forecast_uniq[(forecast_uniq.ds >= gap_start - onemonth) & (forecast_uniq.ds <= gap_end + onemonth)]
-
-
-        gap_forecast['label'] = 'Forecast'
-        line = base.mark_line(strokeWidth=line_width).encode(
-            alt.X('ds:T'), alt.Y('yhat', scale=y_scale),
-            color=alt.Color("label", scale=alt.Scale(domain=list(label_colors.keys()), range=list(label_colors.values())))
-        ).properties(data=gap_forecast)
-
-        graph += line
-
-        # Create and combine areas for gaps
-        area = base.mark_area(opacity=0.3).encode(
-            alt.Y('yhat_lower', scale=y_scale),
-            alt.Y2('yhat_upper'),
-            alt.X('ds:T'),
-            alt.Color("label", scale=alt.Scale(domain=list(label_colors.keys()), range=list(label_colors.values())))
-        ).properties(data=gap_forecast)
-        gap_areas += area
-
-    return (graph + gap_areas).configure(font="Noto Serif")
+    onemonth = np.timedelta64(30, 'D')
+
+    # Combine the forecast around each gap into one dataframe, so that all
+    # gaps are drawn with a single line and area mark, grouped by gap.
+    # With the forecast sorted by date, the rows within a month of each gap
+    # are a contiguous slice; find the slice bounds with a binary search.
+    forecast_sorted = forecast_uniq.sort_values('ds', kind='stable')
+    forecast_dates = forecast_sorted.ds.to_numpy(dtype='datetime64[ns]')
+    gap_starts = pd.to_datetime([gap['start'] for gap in logbook_gaps]).to_numpy() - onemonth
+    gap_ends = pd.to_datetime([gap['end'] for gap in logbook_gaps]).to_numpy() + onemonth
+    slice_starts = np.searchsorted(forecast_dates, gap_starts, side='left')
+    slice_lengths = np.searchsorted(forecast_dates, gap_ends, side='right') - slice_starts
+    # row positions for every gap slice, and the gap each row belongs to
+    gap_ids = np.repeat(np.arange(len(logbook_gaps)), slice_lengths)
+    slice_offsets = np.arange(slice_lengths.sum()) - np.repeat(np.cumsum(slice_lengths) - slice_lengths, slice_lengths)
+    gap_forecast = forecast_sorted.iloc[np.repeat(slice_starts, slice_lengths) + slice_offsets].assign(gap_id=gap_ids, label=pd.Categorical(['Forecast'] * len(gap_ids), dtype=label_type))
+
+    line = base.mark_line(strokeWidth=line_width).encode(
+        ds_x, yhat_y, color=label_color, detail='gap_id:N'
+    ).properties(data=gap_forecast)
+
+    layers.append(line)
+
+    # Create areas for gaps
+    area = base.mark_area(opacity=0.3).encode(
+        alt.Y('yhat_lower', scale=y_scale),
+        alt.Y2('yhat_upper'),
+        ds_x, label_color, detail='gap_id:N'
+    ).properties(data=gap_forecast)
+    layers.extend([gap_areas, area])
+
+    return alt.layer(*layers).configure(font="Noto Serif")
@@ -1,21 +1,20 @@
 # Standard library imports
-from datetime import timedelta, datetime, date
-import warnings
-from typing import Tuple, List, Dict, Union
+from collections import defaultdict
+from datetime import datetime, date
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple, Union
 from pathlib import Path
+import warnings
 
 # Related third party imports
 import altair as alt
+import numpy as np
 import pandas as pd
 from pandas.api.types import CategoricalDtype
-import requests
 
 # Disable max rows for altair
 alt.data_transformers.disable_max_rows()
 
-# Ignore warnings
-warnings.filterwarnings("ignore")
-
 # determine path to data dir relative to this file
 DATA_DIR = (Path(__file__).parent.parent / "data").resolve()
 SOURCE_DATA_DIR = (DATA_DIR / "source_data").resolve()
@@ -31,6 +30,208 @@ CSV_PATHS = {
     "borrow_overrides": DATA_DIR / "long_borrow_overrides.csv",
 }
 
+# Event types that are considered membership events
+MEMBERSHIP_EVENT_TYPES = [
+    "Renewal",
+    "Subscription",
+    "Reimbursement",
+    "Supplement",
+    "Separate Payment",
+]
+
+# Event columns used for logbook analysis (see get_logbook_events)
+LOGBOOK_EVENT_COLUMNS = [
+    "event_type",
+    "start_date",
+    "end_date",
+    "subscription_purchase_date",
+    "member_uris",
+    "member_names",
+    "subscription_duration",
+    "subscription_duration_days",
+    "subscription_volumes",
+    "subscription_category",
+    "source_type",
+]
+
+# Start and end dates of the logbooks; kept locally with the project data
+LOGBOOK_DATES_PATH = DATA_DIR / "logbook-dates.json"
+
+# Column types for the non-string columns in each CSV file, so that pandas
+# does not have to infer them; any column not listed here is read as a string.
+CSV_DTYPES = {
+    "members": {
+        "is_organization": "bool",
+        "has_card": "bool",
+        "birth_year": "float64",
+        "death_year": "float64",
+    },
+    "books": {
+        "year": "float64",
+        "uncertain": "bool",
+        "event_count": "int64",
+        "borrow_count": "int64",
+        "purchase_count": "int64",
+    },
+    "events": {
+        "subscription_price_paid": "float64",
+        "subscription_deposit": "float64",
+        "subscription_duration_days": "float64",
+        "subscription_volumes": "float64",
+        "reimbursement_refund": "float64",
+        "borrow_duration_days": "float64",
+        "purchase_price": "float64",
+        "item_year": "float64",
+    },
+    "borrow_overrides": {
+        "borrow_duration_days": "float64",
+    },
+}
+
+
+def load_csv(
+    dataset: str,
+    row_filter: Optional[Callable[[pd.DataFrame], pd.Series]] = None,
+    chunksize: int = 50_000,
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Load a single dataset from its CSV file.
+
+    Columns are read with the types specified in 'CSV_DTYPES' rather than
+    inferred by pandas. If a row filter is specified, the file is read in
+    chunks and only matching rows are kept, so the full dataset is never
+    held in memory at once. If columns are specified, only those columns
+    are parsed.
+
+    Args:
+        dataset (str): The name of the dataset; one of the keys of 'CSV_PATHS'.
+        row_filter (Callable, optional): Function that takes a DataFrame and
+            returns a boolean Series indicating which rows to keep.
+        chunksize (int): Number of rows to read at a time when filtering.
+        columns (List[str], optional): The columns to load; all columns
+            if not specified.
+
+    Returns:
+        pd.DataFrame: The loaded DataFrame.
+    """
+    dtype = defaultdict(lambda: str, CSV_DTYPES[dataset])
+    if row_filter is None:
+        return pd.read_csv(CSV_PATHS[dataset], dtype=dtype, usecols=columns)
+
+    with pd.read_csv(
+        CSV_PATHS[dataset], dtype=dtype, usecols=columns, chunksize=chunksize
+    ) as reader:
+        return pd.concat(
+            [chunk[row_filter(chunk)] for chunk in reader], ignore_index=True
+        )
+
+
+@lru_cache(maxsize=8)
+def _read_dataset(dataset: str, path: Path, mtime: float) -> pd.DataFrame:
+    """
+    Read a dataset from its CSV or Parquet file. Results are cached by
+    file path and modification time, so repeated loads in the same session
+    only read the file again if it changes; callers must not modify the
+    returned DataFrame.
+
+    Args:
+        dataset (str): The name of the dataset; one of the keys of 'CSV_PATHS'.
+        path (Path): The CSV or Parquet file to read.
+        mtime (float): Modification time of the file.
+
+    Returns:
+        pd.DataFrame: The loaded DataFrame.
+    """
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    return load_csv(dataset)
+
+
+def load_dataset(
+    dataset: str,
+    row_filter: Optional[Callable[[pd.DataFrame], pd.Series]] = None,
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Load a single dataset.
+
+    If a Parquet copy of the CSV file has been generated
+    (see 'data/build_parquet.py') and is at least as new as the CSV,
+    the Parquet file is loaded instead, which is much faster than
+    parsing the CSV. Reading Parquet requires pyarrow.
+
+    Complete datasets are cached, so loading the same dataset again
+    (e.g. when re-running notebook cells) returns a copy of the
+    previously loaded data instead of reading the file again.
+
+    Args:
+        dataset (str): The name of the dataset; one of the keys of 'CSV_PATHS'.
+        row_filter (Callable, optional): Function that takes a DataFrame and
+            returns a boolean Series indicating which rows to keep.
+        columns (List[str], optional): The columns to load (e.g.
+            'LOGBOOK_EVENT_COLUMNS'); all columns if not specified. Any
+            columns used by the row filter must be included.
+
+    Returns:
+        pd.DataFrame: The loaded DataFrame.
+    """
+    csv_path = CSV_PATHS[dataset]
+    parquet_path = csv_path.with_suffix(".parquet")
+    if (
+        parquet_path.exists()
+        and parquet_path.stat().st_mtime >= csv_path.stat().st_mtime
+    ):
+        path = parquet_path
+    else:
+        path = csv_path
+
+    if row_filter is None and columns is None:
+        # copy, since preprocessing modifies the loaded data in place
+        return _read_dataset(dataset, path, path.stat().st_mtime).copy()
+    if path == csv_path:
+        return load_csv(dataset, row_filter=row_filter, columns=columns)
+    df = pd.read_parquet(path, columns=columns)
+    if row_filter is not None:
+        df = df[row_filter(df)].reset_index(drop=True)
+    return df
+
+
+def is_logbook_source(source_type: pd.Series) -> pd.Series:
+    """
+    Identify which values of a source type column are (or include) logbooks.
+
+    There are only a handful of distinct source types, so the substring
+    check is done once per distinct value rather than once per event.
+
+    Args:
+        source_type (pd.Series): The 'source_type' column of an events DataFrame.
+
+    Returns:
+        pd.Series: Boolean Series indicating which sources include a logbook.
+    """
+    logbook_sources = [
+        source for source in source_type.dropna().unique() if "Logbook" in source
+    ]
+    return source_type.isin(logbook_sources)
+
+
+def is_logbook_or_membership_event(events_df: pd.DataFrame) -> pd.Series:
+    """
+    Row filter for events that are recorded in the logbooks or are
+    membership events; for use with :func:`load_dataset` when only these
+    events are needed (e.g. for the logbook gaps and membership analysis).
+
+    Args:
+        events_df (pd.DataFrame): The events DataFrame.
+
+    Returns:
+        pd.Series: Boolean Series indicating which events match.
+    """
+    return is_logbook_source(events_df.source_type) | events_df.event_type.isin(
+        MEMBERSHIP_EVENT_TYPES
+    )
+
 
 def load_initial_data() -> (
     Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]
@@ -46,12 +247,11 @@ def load_initial_data() -> (
     Returns:
         Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]: A tuple containing the 'events', 'members', 'books', and 'borrow_overrides' DataFrames.
     """
-    # Load the data from the corresponding CSV file.
-    # The 'low_memory' parameter is set to False to prevent low memory warnings.
-    events_df = pd.read_csv(CSV_PATHS["events"], low_memory=False)
-    members_df = pd.read_csv(CSV_PATHS["members"], low_memory=False)
-    books_df = pd.read_csv(CSV_PATHS["books"], low_memory=False)
-    borrow_overrides_df = pd.read_csv(CSV_PATHS["borrow_overrides"], low_memory=False)
+    # Load the data from the corresponding CSV (or Parquet) file.
+    events_df = load_dataset("events")
+    members_df = load_dataset("members")
+    books_df = load_dataset("books")
+    borrow_overrides_df = load_dataset("borrow_overrides")
 
     # Return the data
     return events_df, members_df, books_df, borrow_overrides_df
@@ -85,7 +285,7 @@ def get_preprocessed_data(*datasets) -> Dict[str, pd.DataFrame]:
 
     data = {}
     for dataset in datasets:
-        data[dataset] = pd.read_csv(CSV_PATHS[dataset], low_memory=False)
+        data[dataset] = load_dataset(dataset)
 
     # preprocess any of these that are present
     if "events" in datasets:
@@ -104,6 +304,24 @@ def short_id(uri):
     return uri.rstrip("/").split("/")[-1] if pd.notna(uri) else None
 
 
+def short_ids(uris: pd.Series) -> pd.Series:
+    """Generate short IDs for a Series of S&co URIs; vectorized
+    equivalent of :func:`short_id`. Missing URIs are left missing.
+    URIs repeat across events, so IDs are generated once for each
+    distinct URI and then mapped back."""
+    codes, unique_uris = pd.factorize(uris)
+    unique_ids = (
+        pd.Series(unique_uris, dtype=object)
+        .str.rstrip("/")
+        .str.rsplit("/", n=1)
+        .str[-1]
+    )
+    # factorize codes missing values as -1, which selects the appended NaN
+    return pd.Series(
+        np.append(unique_ids.to_numpy(), np.nan)[codes], index=uris.index
+    )
+
+
 def preprocess_events_data(events_df: pd.DataFrame) -> pd.DataFrame:
     """
     Pre-processing for events data.
@@ -121,13 +339,15 @@ def preprocess_events_data(events_df: pd.DataFrame) -> pd.DataFrame:
     # Split the 'member_uris' column into 'first_member_uri' and
     # 'second_member_uri' columns. This is done to handle shared
     # accounts where multiple members are associated with a single account.
+    # Split only on the first separator, so the result always has (at most)
+    # the two columns being assigned.
     events_df[
         ["first_member_uri", "second_member_uri"]
-    ] = events_df.member_uris.str.split(";", expand=True)
+    ] = events_df.member_uris.str.split(";", n=1, expand=True)
 
     # Generate short IDs for members and items.
-    events_df["member_id"] = events_df.first_member_uri.apply(short_id)
-    events_df["item_id"] = events_df.item_uri.apply(short_id)
+    events_df["member_id"] = short_ids(events_df.first_member_uri)
+    events_df["item_id"] = short_ids(events_df.item_uri)
 
     # Return the processed 'events' DataFrame.
     return events_df
@@ -147,7 +367,7 @@ def preprocess_shxco_data(df: pd.DataFrame) -> pd.DataFrame:
         pd.DataFrame: processed 'books' or 'members' DataFrame.
     """
     # Generate short IDs from item URIs
-    df["id"] = df.uri.apply(short_id)
+    df["id"] = short_ids(df.uri)
 
     # Return the processed 'DataFrame.
     return df
@@ -174,72 +394,117 @@ def get_logbook_events(events_df: pd.DataFrame) -> pd.DataFrame:
     """
     # Filter the 'events_df' DataFrame to include only logbook events.
     # Select relevant columns for further processing.
-    logbook_events_df = events_df[events_df.source_type.str.contains("Logbook")][
-        [
-            "event_type",
-            "start_date",
-            "end_date",
-            "subscription_purchase_date",
-            "member_uris",
-            "member_names",
-            "subscription_duration",
-            "subscription_duration_days",
-            "subscription_volumes",
-            "subscription_category",
-            "source_type",
-        ]
+    logbook_events_df = events_df[is_logbook_source(events_df.source_type)][
+        LOGBOOK_EVENT_COLUMNS
     ]
 
-    # Convert the 'start_date' and 'subscription_purchase_date' columns to datetime format.
-    logbook_events_df["start_date"] = pd.to_datetime(
-        logbook_events_df["start_date"], format="ISO8601", errors="coerce"
-    )
-    logbook_events_df["subscription_purchase_date"] = pd.to_datetime(
-        logbook_events_df["subscription_purchase_date"],
-        format="ISO8601",
-        errors="coerce",
-    )
+    # Convert the 'start_date' and 'subscription_purchase_date' columns to
+    # datetime format, unless that has already been done.
+    for date_column in ["start_date", "subscription_purchase_date"]:
+        if not pd.api.types.is_datetime64_any_dtype(logbook_events_df[date_column]):
+            logbook_events_df[date_column] = pd.to_datetime(
+                logbook_events_df[date_column], format="ISO8601", errors="coerce"
+            )
 
     # Create a new column 'logbook_date' that contains the subscription
     # purchase date if available, otherwise the start date.
-    logbook_events_df["logbook_date"] = logbook_events_df.apply(
-        lambda row: row.subscription_purchase_date
-        if pd.notna(row.subscription_purchase_date)
-        else row.start_date,
-        axis=1,
-    )
+    logbook_events_df["logbook_date"] = logbook_events_df[
+        "subscription_purchase_date"
+    ].fillna(logbook_events_df["start_date"])
 
     # Return the logbook events DataFrame.
     return logbook_events_df
 
 
+def get_earliest_date(events_df: pd.DataFrame) -> pd.Series:
+    """
+    Get the earliest date for each event.
+
+    This function returns the earliest date among the 'start_date', 'subscription_purchase_date', and 'end_date' columns for each event, converted to datetime. Missing dates are ignored; if all of these dates are missing, the earliest date is NaT. If any of these dates is missing a year (e.g. '--12-02'), the earliest date cannot be determined and is also NaT. Columns that have already been converted to datetime are used as-is, so dates only need to be parsed once.
+
+    Args:
+        events_df (pd.DataFrame): The events DataFrame. Expected to have 'start_date', 'subscription_purchase_date',
+        and 'end_date' columns.
+
+    Returns:
+        pd.Series: The earliest date for each event.
+    """
+    date_columns = events_df[["start_date", "subscription_purchase_date", "end_date"]]
+    # Date columns that have not already been converted to datetime.
+    string_columns = [
+        col
+        for col in date_columns
+        if not pd.api.types.is_datetime64_any_dtype(date_columns[col])
+    ]
+
+    # Convert each date column to datetime (unless that has already been done)
+    # and take the minimum across columns; fmin ignores NaT unless all values are NaT.
+    dates = [
+        pd.to_datetime(date_columns[col], format="ISO8601", errors="coerce").to_numpy()
+        if col in string_columns
+        else date_columns[col].to_numpy()
+        for col in date_columns
+    ]
+    earliest = pd.Series(np.fmin.reduce(dates), index=events_df.index)
+
+    # Dates without a year can't be compared with the other dates.
+    unknown_year = np.zeros(len(events_df), dtype=bool)
+    for col in string_columns:
+        unknown_year |= date_columns[col].str.startswith("--", na=False).to_numpy()
+    return earliest.mask(unknown_year)
+
+
 def earliest_date(row: pd.Series) -> date:
     """
     Get the earliest date from the row.
 
-    This function takes a row of data and returns the earliest date among the 'start_date', 'subscription_purchase_date', and 'end_date' columns. If these columns contain NaN values, they are ignored. If all these columns are NaN, the function returns None.
+    .. deprecated::
+        Use :func:`get_earliest_date`, which calculates the earliest date
+        for all events at once; this wrapper calls it for a single row and
+        returns the date in datetime format.
 
     Args:
         row (pd.Series): A row of data. Expected to have 'start_date', 'subscription_purchase_date',
         and 'end_date' columns.
 
     Returns:
-        datetime.date: The earliest date among the 'start_date', 'subscription_purchase_date',
-        and 'end_date' columns. Returns None if all these columns are NaN.
+        pd.Timestamp: The earliest date among the 'start_date', 'subscription_purchase_date',
+        and 'end_date' columns; NaT if it can't be determined.
     """
-    # Create a list of dates from the 'start_date', 'subscription_purchase_date', and 'end_date' columns. Ignore NaN values.
-    dates = [
-        val
-        for val in [row.start_date, row.subscription_purchase_date, row.end_date]
-        if not pd.isna(val)
-    ]
+    warnings.warn(
+        "earliest_date is deprecated; use get_earliest_date instead",
+        DeprecationWarning,
+        stacklevel=2,
+    )
+    return get_earliest_date(row.to_frame().T).iloc[0]
 
-    # If the list of dates is not empty, return the earliest date. Otherwise, return None.
-    if dates:
-        return min(dates)
 
+def _earliest_date_values(events_df: pd.DataFrame) -> pd.Series:
+    """
+    Earliest of the 'start_date', 'subscription_purchase_date', and
+    'end_date' values for each event, compared as given (i.e. as ISO date
+    strings) without conversion; missing if all three are missing.
+    """
+    date_columns = events_df[["start_date", "subscription_purchase_date", "end_date"]]
+    values = date_columns.to_numpy(dtype=object)
+    missing = pd.isna(values)
+    # fill missing values with a placeholder that sorts after any date,
+    # then take the first value in each row
+    if all(
+        pd.api.types.is_datetime64_any_dtype(date_columns[col]) for col in date_columns
+    ):
+        placeholder = pd.Timestamp.max
+    else:
+        placeholder = "\uffff"
+    values[missing] = placeholder
+    earliest = np.sort(values, axis=1)[:, 0]
+    earliest[missing.all(axis=1)] = np.nan
+    return pd.Series(earliest, index=events_df.index)
 
-def get_membership_events(events_df: pd.DataFrame) -> pd.DataFrame:
+
+def get_membership_events(
+    events_df: pd.DataFrame, earliest_dates: Optional[pd.Series] = None
+) -> pd.DataFrame:
     """
     Get membership events from the events dataframe.
 
@@ -247,38 +512,32 @@ def get_membership_events(events_df: pd.DataFrame) -> pd.DataFrame:
     which are defined as events of type 'Renewal', 'Subscription', 'Reimbursement',
     'Supplement', or 'Separate Payment'.
 
-    It then creates a new column 'earliest_date' that contains the earliest date
-    among the 'start_date', 'subscription_purchase_date', and 'end_date'
-    columns for each event.
-
-    Finally, it creates a new column 'date' that contains the 'earliest_date'
-    values converted to datetime format.
+    It then creates a new column 'earliest_date' that contains the earliest
+    date among the 'start_date', 'subscription_purchase_date', and 'end_date'
+    columns for each event, as given in the data, and a new column 'date'
+    with the earliest date for each event in datetime format.
 
     Args:
         events_df (pd.DataFrame): The initial 'events' DataFrame.
+        earliest_dates (pd.Series, optional): Earliest date for each event,
+            as returned by :func:`get_earliest_date` for 'events_df'; used
+            for the 'date' column. If not specified, the dates are
+            calculated. Pass this to reuse the dates when also calling
+            :func:`get_member_events`; the 'earliest_date' column is always
+            taken from the date values as given, which is cheap.
 
     Returns:
         pd.DataFrame: The membership events DataFrame.
     """
     # Filter the 'events_df' DataFrame to include only membership events.
-    membership_events = events_df[
-        events_df.event_type.isin(
-            [
-                "Renewal",
-                "Subscription",
-                "Reimbursement",
-                "Supplement",
-                "Separate Payment",
-            ]
-        )
-    ]
-
-    # Create a new column 'earliest_date' that contains the earliest date among the 'start_date', 'subscription_purchase_date', and 'end_date' columns for each event.
-    membership_events["earliest_date"] = membership_events.apply(earliest_date, axis=1)
-
-    # Create a new column 'date' that contains the 'earliest_date' values converted to datetime format.
-    membership_events["date"] = pd.to_datetime(
-        membership_events["earliest_date"], format="ISO8601", errors="coerce"
+    membership_events = events_df[events_df.event_type.isin(MEMBERSHIP_EVENT_TYPES)]
+
+    # Create new columns 'earliest_date' and 'date' that contain the earliest date among the 'start_date', 'subscription_purchase_date', and 'end_date' columns for each event, as given and in datetime format.
+    if earliest_dates is None:
+        earliest_dates = get_earliest_date(membership_events)
+    # (assign aligns the dates with the filtered events by index)
+    membership_events = membership_events.assign(
+        earliest_date=_earliest_date_values(membership_events), date=earliest_dates
     )
 
     # Return the membership events DataFrame.
@@ -296,54 +555,66 @@ def print_gaps(gaps: List[Dict[str, Union[datetime, int]]], gap_type: str):
         with 'start', 'end', and 'days' keys representing the start date, end date, and duration of the gap.
         gap_type (str): The type of gaps ("large" or "small").
     """
-    # Print the number of gaps and the gap type.
-    print(f"\nThe {len(gaps)} {gap_type} gaps in the logbooks")
+    # Format the start date, end date, and duration of each gap.
+    gap_lines = [
+        f"\t{gap['start'].strftime('%B %d %Y')} to {gap['end'].strftime('%B %d %Y')} ({gap['days']} days)"
+        for gap in gaps
+    ]
 
-    # Iterate over the gaps.
-    for gap in gaps:
-        # Print the start date, end date, and duration of the gap.
-        print(
-            f"\t{gap['start'].strftime('%B %d %Y')} to {gap['end'].strftime('%B %d %Y')} ({gap['days']} days)"
-        )
+    # Print the number of gaps and the gap type, followed by the gaps,
+    # with a single print call.
+    print(f"\nThe {len(gaps)} {gap_type} gaps in the logbooks", *gap_lines, sep="\n")
 
 
 def exclude_gap_events(
-    events_df: pd.DataFrame, gaps: List[Dict[str, Union[datetime, int]]]
+    events_df: pd.DataFrame,
+    gaps: List[Dict[str, Union[datetime, int]]],
+    date_column: str = "logbook_date",
 ) -> pd.DataFrame:
     """
     Exclude events occurring during the identified gaps.
 
-    This function takes a DataFrame of events and a list of gaps, and returns a new DataFrame  that excludes any events occurring during the gaps. Each gap is a dictionary with 'start' and 'end' keys representing the start and end dates of the gap.
+    This function takes a DataFrame of events and a list of gaps, and returns a new DataFrame  that excludes any events occurring during the gaps. Each gap is a dictionary with 'start' and 'end' keys representing the start and end dates of the gap; gaps are not expected to overlap.
 
     Args:
         events_df (pd.DataFrame): The DataFrame of events. Expected to have a 'logbook_date' column.
         gaps (List[Dict[str, Union[datetime, int]]]): The list of gaps. Each gap is a dictionary
         with 'start' and 'end' keys representing the start and end dates of the gap.
+        date_column (str): The column with the event dates (default: 'logbook_date').
 
     Returns:
         pd.DataFrame: A new DataFrame that excludes any events occurring during the gaps.
     """
-    # Create a copy of the events DataFrame to avoid modifying the original DataFrame.
-    events_nogaps_df = events_df.copy()
-
-    # Iterate over the gaps.
-    for gap in gaps:
-        # Get the start and end dates of the gap.
-        gap_start = gap["start"]
-        gap_end = gap["end"]
+    # Create an index of the gap intervals, including start and end dates.
+    gap_intervals = pd.IntervalIndex.from_arrays(
+        [gap["start"] for gap in gaps], [gap["end"] for gap in gaps], closed="both"
+    )
 
-        # Exclude events that occur during the gap. This is done by keeping only the events that occur before the start of the gap or after the end of the gap.
-        events_nogaps_df = events_nogaps_df[
-            ~(
-                (events_nogaps_df.logbook_date >= gap_start)
-                & (events_nogaps_df.logbook_date <= gap_end)
-            )
-        ]
+    # Exclude events that occur during any gap. The indexer returns -1 for
+    # dates that do not fall within any of the gap intervals.
+    in_gap = gap_intervals.get_indexer(events_df[date_column]) != -1
+    events_nogaps_df = events_df[~in_gap]
 
     # Return the DataFrame that excludes any events occurring during the gaps.
     return events_nogaps_df
 
 
+@lru_cache(maxsize=1)
+def _load_logbook_dates(mtime: float) -> pd.DataFrame:
+    """
+    Load the logbook start and end dates, sorted by start date. Results
+    are cached by file modification time, so the JSON file is only read
+    again if it changes.
+
+    Args:
+        mtime (float): Modification time of the logbook dates file.
+
+    Returns:
+        pd.DataFrame: The logbook dates, with 'startDate' and 'endDate' columns.
+    """
+    return pd.read_json(LOGBOOK_DATES_PATH).sort_values("startDate")
+
+
 def identify_logbook_gaps(
     logbook_events_df: pd.DataFrame, output_gaps: bool = True
 ) -> Tuple[pd.DataFrame, pd.DataFrame]:
@@ -363,39 +634,39 @@ def identify_logbook_gaps(
         pd.DataFrame: The logbook gaps dataframe.
         pd.DataFrame: The logbooks weekly count dataframe.
     """
-    # Load the logbook dates from a JSON file and sort them by 'startDate'.
-    logbook_dates = pd.read_json(DATA_DIR / "logbook-dates.json").sort_values(
-        "startDate"
-    )
+    # Load the logbook dates from a JSON file, sorted by 'startDate'.
+    logbook_dates = _load_logbook_dates(LOGBOOK_DATES_PATH.stat().st_mtime)
 
     # Define the minimum gap duration to consider.
     MIN_GAP_DAYS = 15
 
-    # Initialize lists to store the identified gaps and skipped gaps.
-    logbook_gaps = []
-    skipped_gaps = []
-
     # Define a timedelta of one day for date calculations.
-    oneday = timedelta(days=1)
-
-    # Iterate over the logbook dates to identify gaps.
-    for i in range(len(logbook_dates) - 1):
-        # Define the start and end of the gap as the end of the current logbook date and the start of the next one.
-        gap_start = pd.to_datetime(logbook_dates.iloc[i]["endDate"]) + oneday
-        gap_end = pd.to_datetime(logbook_dates.iloc[i + 1]["startDate"]) - oneday
-
-        # Calculate the duration of the gap in days.
-        gap_duration = (gap_end - gap_start).days
-
-        # Store the gap if its duration is greater than the minimum gap duration.
-        if gap_duration > MIN_GAP_DAYS:
-            logbook_gaps.append(
-                {"start": gap_start, "end": gap_end, "days": gap_duration}
-            )
-        elif gap_duration > 0:  # Ignore 0 and -1 duration "gaps"!
-            skipped_gaps.append(
-                {"start": gap_start, "end": gap_end, "days": gap_duration}
+    oneday = np.timedelta64(1, "D")
+
+    # Define the start and end of each gap as the day after the end of one
+    # logbook and the day before the start of the next one.
+    gap_starts = logbook_dates.endDate.to_numpy(dtype="datetime64[D]")[:-1] + oneday
+    gap_ends = logbook_dates.startDate.to_numpy(dtype="datetime64[D]")[1:] - oneday
+
+    # Calculate the duration of each gap in days.
+    gap_durations = (gap_ends - gap_starts).astype(int)
+
+    def gap_list(mask: np.ndarray) -> List[Dict[str, Union[datetime, int]]]:
+        # Convert the selected gaps to a list of dictionaries.
+        return [
+            {"start": pd.Timestamp(start), "end": pd.Timestamp(end), "days": int(days)}
+            for start, end, days in zip(
+                gap_starts[mask].astype("datetime64[ns]"),
+                gap_ends[mask].astype("datetime64[ns]"),
+                gap_durations[mask],
             )
+        ]
+
+    # Store the gaps with a duration greater than the minimum gap duration;
+    # keep track of shorter gaps, ignoring 0 and -1 duration "gaps"!
+    large_gaps = gap_durations > MIN_GAP_DAYS
+    logbook_gaps = gap_list(large_gaps)
+    skipped_gaps = gap_list((gap_durations > 0) & (gap_durations <= MIN_GAP_DAYS))
 
     # Print the identified gaps and skipped gaps.
     if output_gaps:
@@ -407,27 +678,35 @@ def identify_logbook_gaps(
 
     # Calculate the weekly count of logbook events excluding the gaps.
     logbooks_weekly_count = (
-        logbook_events_nogaps.groupby([pd.Grouper(key="logbook_date", freq="W")])[
-            "event_type"
-        ]
-        .count()
+        logbook_events_nogaps.resample("W", on="logbook_date")
+        .size()
+        .rename("total")
         .reset_index()
     )
-    logbooks_weekly_count.rename(columns={"event_type": "total"}, inplace=True)
-
-    # Convert the list of gaps to a DataFrame and add a 'gap_label' column.
-    logbook_gaps_df = pd.DataFrame(logbook_gaps)
-    logbook_gaps_df["gap_label"] = logbook_gaps_df.apply(
-        lambda row: "%s to %s (%d days)"
-        % (row.start.date().isoformat(), row.end.date().isoformat(), row.days),
-        axis=1,
+
+    # Build a DataFrame of the gaps directly from the gap arrays and add a
+    # 'gap_label' column.
+    logbook_gaps_df = pd.DataFrame(
+        {
+            "start": gap_starts[large_gaps].astype("datetime64[ns]"),
+            "end": gap_ends[large_gaps].astype("datetime64[ns]"),
+            "days": gap_durations[large_gaps],
+        }
+    )
+    logbook_gaps_df["gap_label"] = (
+        logbook_gaps_df["start"].dt.strftime("%Y-%m-%d")
+        + " to "
+        + logbook_gaps_df["end"].dt.strftime("%Y-%m-%d")
+        + " ("
+        + logbook_gaps_df["days"].astype(str)
+        + " days)"
     )
 
     return logbook_gaps_df, logbooks_weekly_count, logbook_gaps, logbook_events_nogaps
 
 
 def get_member_events(
-    events_df: pd.DataFrame,
+    events_df: pd.DataFrame, earliest_dates: Optional[pd.Series] = None
 ) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
     Get member events from the events dataframe.
@@ -442,28 +721,33 @@ def get_member_events(
 
     Args:
         events_df (pd.DataFrame): The events dataframe.
+        earliest_dates (pd.Series, optional): Earliest date for each event,
+            as returned by :func:`get_earliest_date` for 'events_df'; if
+            not specified, the dates are calculated.
 
     Returns:
         pd.DataFrame: The member events dataframe.
         pd.DataFrame: The new member yearly count dataframe.
     """
-    # Process the events data.
-    events_df = preprocess_events_data(events_df)
-
-    # Create a copy of the events DataFrame and identify the earliest known date for each event.
-    member_dates = events_df.copy()
-    member_dates["earliest_date"] = member_dates.apply(earliest_date, axis=1)
-
-    # Convert the 'earliest_date' column to datetime format.
-    member_dates["date"] = pd.to_datetime(
-        member_dates["earliest_date"], format="ISO8601", errors="coerce"
-    )
+    # Process the events data, unless that has already been done.
+    if "member_id" not in events_df.columns:
+        events_df = preprocess_events_data(events_df)
+
+    # Identify the earliest known date for each event, and keep only
+    # events with known dates that occurred before 1942 (NaT compares as
+    # False, so events without dates are excluded too).
+    if earliest_dates is None:
+        event_dates = get_earliest_date(events_df)
+    else:
+        event_dates = earliest_dates.reindex(events_df.index)
+    before_1942 = event_dates.to_numpy() < np.datetime64("1942-01-01")
 
-    # Filter the events to include only those with known dates and that occurred before 1942.
-    members_added = member_dates[
-        ["event_type", "member_id", "date", "source_type"]
-    ].dropna(subset=["date"])
-    members_added = members_added[members_added["date"] < datetime(1942, 1, 1)]
+    # Select the matching events and only the columns needed, in one step,
+    # rather than copying the member and item URIs along with everything else.
+    members_added = events_df.loc[
+        before_1942, ["event_type", "member_id", "source_type"]
+    ]
+    members_added.insert(2, "date", event_dates[before_1942])
 
     # Create a custom order for the event types.
     # The main order we care about is having 'Subscription' first.
@@ -484,26 +768,39 @@ def get_member_events(
         ordered=True,
     )
 
-    # Copy the member events DataFrame and convert the 'event_type' column to the defined categorical type.
-    member_events = members_added.copy()
-    member_events["event_type"] = member_events.event_type.astype(event_type)
+    # Convert the 'event_type' column to the defined categorical type.
+    member_events = members_added.astype({"event_type": event_type})
 
-    # Sort the member events by date and event type.
-    member_events = member_events.sort_values(by=["date", "event_type"])
+    # Sort the member events by date and event type, using the integer
+    # category codes for event type; unknown types (code -1) sort last.
+    event_type_codes = member_events["event_type"].cat.codes
+    member_events = (
+        member_events.assign(
+            _event_type_code=event_type_codes.where(
+                event_type_codes >= 0, len(event_type.categories)
+            )
+        )
+        .sort_values(by=["date", "_event_type_code"], kind="stable")
+        .drop(columns="_event_type_code")
+    )
 
-    # Group the events by member ID and get the first event for each member.
-    members_grouped = member_events[
-        ["member_id", "date", "event_type", "source_type"]
-    ].groupby("member_id")
-    members_first_dates = members_grouped.first().reset_index()
+    # Group the events by member ID and get the first event for each member;
+    # events are already sorted, and first() skips missing values in each
+    # column (e.g. events with no event type).
+    members_first_dates = (
+        member_events[["member_id", "date", "event_type", "source_type"]]
+        .groupby("member_id")
+        .first()
+        .reset_index()
+    )
 
     # Calculate the yearly count of new members.
     newmember_yearly_count = (
-        members_first_dates.groupby([pd.Grouper(key="date", freq="Y")])["member_id"]
-        .count()
+        members_first_dates.resample("YE", on="date")
+        .size()
+        .rename("total")
         .reset_index()
     )
-    newmember_yearly_count.rename(columns={"member_id": "total"}, inplace=True)
 
     return member_events, newmember_yearly_count, members_first_dates
 
@@ -528,47 +825,32 @@ def get_newmember_subscriptions(member_events, logbook_gaps):
         pd.DataFrame: The weekly count of new member subscriptions.
     """
     # Filter the 'member_events' DataFrame to include only logbook events of type 'Subscription' or 'Renewal'.
-    # Group by member ID to get the first event for each member.
+    # Member events are sorted by date, so keep the first event for each member.
     subscription_first_events = (
         member_events[
-            member_events.source_type.str.contains("Logbook")
+            is_logbook_source(member_events.source_type)
             & member_events.event_type.isin(["Subscription", "Renewal"])
         ]
-        .groupby("member_id")
-        .first()
-        .reset_index()
+        .drop_duplicates("member_id", keep="first")
+        .reset_index(drop=True)
     )
 
     # Exclude any events occurring during the identified gaps in the logbooks.
-    subscription_first_events_nogaps = subscription_first_events.copy()
-    for _, gap in enumerate(logbook_gaps):
-        gap_start = gap["start"]
-        gap_end = gap["end"]
-        subscription_first_events_nogaps = subscription_first_events_nogaps[
-            ~(
-                (subscription_first_events_nogaps.date >= gap_start)
-                & (subscription_first_events_nogaps.date <= gap_end)
-            )
-        ]
+    subscription_first_events_nogaps = exclude_gap_events(
+        subscription_first_events, logbook_gaps, date_column="date"
+    )
+
+    # Index the subscriptions by date (already in date order) for counting.
+    subscription_dates = subscription_first_events_nogaps.set_index("date")
 
     # Calculate the yearly count of new member subscriptions.
     newmember_subscriptions_by_year = (
-        subscription_first_events_nogaps.groupby([pd.Grouper(key="date", freq="Y")])[
-            "member_id"
-        ]
-        .count()
-        .reset_index()
+        subscription_dates.resample("YE").size().rename("total").reset_index()
     )
-    newmember_subscriptions_by_year.rename(columns={"member_id": "total"}, inplace=True)
 
     # Calculate the weekly count of new member subscriptions.
     newmember_subscriptions_by_week = (
-        subscription_first_events_nogaps.groupby([pd.Grouper(key="date", freq="W")])[
-            "member_id"
-        ]
-        .count()
-        .reset_index()
+        subscription_dates.resample("W").size().rename("total").reset_index()
     )
-    newmember_subscriptions_by_week.rename(columns={"member_id": "total"}, inplace=True)
 
     return newmember_subscriptions_by_year, newmember_subscriptions_by_week